@@ -12,6 +12,13 @@ from facebook_scraper import get_posts
 import urllib.parse
 from pypdf import PdfReader
 import urllib3
+import hashlib
+import random
+import threading
+from html import unescape
+import shutil
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Disabilita i warning di sicurezza per siti vecchi (fondamentale per Massa/Barga)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -27,6 +34,25 @@ wa_keys_env = os.environ.get("WHATSAPP_KEY", "")
 WA_PHONES = [p.strip() for p in wa_phones_env.split(',') if p.strip()]
 WA_KEYS = [k.strip() for k in wa_keys_env.split(',') if k.strip()]
 
+# --- CONFIGURAZIONE CONTROLLO LINK ---
+# LINK_CHECK=mark segnala i link morti nelle card, LINK_CHECK=drop li rimuove, vuoto = controllo disattivato
+LINK_CHECK_MODE = os.environ.get("LINK_CHECK", "").strip().lower()
+LINK_HEALTH_FILE = "link_health.json"
+LINK_HEALTH_TTL = timedelta(hours=24)
+# Ogni link scade tra TTL-JITTER e TTL, così le verifiche si distribuiscono sui vari giri
+LINK_HEALTH_JITTER = timedelta(hours=6)
+LINK_CHECK_WORKERS = 16
+LINK_CHECK_PER_HOST = 4
+LINK_CHECK_TIMEOUT = 6
+DEAD_STATUSES = (404, 410)
+
+# --- CONFIGURAZIONE INDICE DI RICERCA ---
+SEARCH_DIR = "search"
+SEARCH_STATE_FILE = "search_state.json"
+SEARCH_PREFIX_LEN = 2
+SEARCH_DOCS_PER_CHUNK = 100
+SEARCH_STOPWORDS = {'al', 'alla', 'alle', 'agli', 'ai', 'all', 'con', 'da', 'dal', 'dalla', 'dall', 'dai', 'de', 'dei', 'del', 'della', 'delle', 'dell', 'degli', 'di', 'ed', 'gli', 'il', 'in', 'la', 'le', 'lo', 'nel', 'nella', 'nell', 'nei', 'per', 'su', 'sul', 'sulla', 'sull', 'tra', 'fra', 'un', 'una', 'uno', 'che'}
+
 # --- GESTIONE REGISTRO LINK (MEMORIA STORICA) ---
 REGISTRY_FILE = "link_registry.json"
 LINK_REGISTRY = {}
@@ -534,6 +560,125 @@ def scrape_generic_media(urls, source_name, base_domain, color="#3498db"):
         except: pass
     return media_events
 
+# --- CONTROLLO SALUTE LINK ---
+def load_link_health():
+    if os.path.exists(LINK_HEALTH_FILE):
+        try:
+            with open(LINK_HEALTH_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except: pass
+    return {}
+
+def save_link_health(cache):
+    try:
+        with open(LINK_HEALTH_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=4)
+    except Exception as e:
+        print(f"Errore salvataggio stato link: {e}")
+
+PROBE_SESSIONS = threading.local()
+
+def get_probe_session():
+    # Una sessione per worker: le connessioni verso lo stesso host vengono riusate
+    if not hasattr(PROBE_SESSIONS, 'session'):
+        PROBE_SESSIONS.session = requests.Session()
+        PROBE_SESSIONS.session.headers['User-Agent'] = 'Mozilla/5.0'
+    return PROBE_SESSIONS.session
+
+def probe_link(url):
+    try:
+        session = get_probe_session()
+        with session.head(url, timeout=LINK_CHECK_TIMEOUT, allow_redirects=True, verify=False) as resp:
+            status = resp.status_code
+    except Exception:
+        # Host irraggiungibile o timeout: inutile riprovare con GET
+        return None
+    # Molti server (WordPress, siti vecchi) non gestiscono HEAD: riprova scaricando solo il primo byte
+    if status >= 400:
+        try:
+            with session.get(url, headers={'Range': 'bytes=0-0'}, timeout=LINK_CHECK_TIMEOUT, allow_redirects=True, verify=False, stream=True) as resp:
+                status = resp.status_code
+        except Exception: pass
+    return status
+
+def make_link_health_entry(now, status):
+    ttl = LINK_HEALTH_TTL - timedelta(seconds=random.uniform(0, LINK_HEALTH_JITTER.total_seconds()))
+    return {"checked": now.isoformat(), "ttl": int(ttl.total_seconds()), "status": status}
+
+def check_links(events):
+    cache = load_link_health()
+    now = datetime.now()
+    links = {ev['link'] for ev in events}
+    results = {}
+    to_check = []
+    for link in links:
+        try:
+            entry = cache[link]
+            ttl = timedelta(seconds=entry.get('ttl', LINK_HEALTH_TTL.total_seconds()))
+            if now - datetime.fromisoformat(entry['checked']) < ttl:
+                results[link] = entry['status']
+                continue
+        except: pass
+        to_check.append(link)
+
+    print(f"\n--- Controllo link: {len(links)} totali, {len(to_check)} da verificare ---")
+    start = time.time()
+    # I link restano in coda per host e vengono passati al pool solo quando l'host ha posti liberi,
+    # così un host lento o irraggiungibile non occupa i worker destinati agli altri
+    pending = {}
+    for link in to_check:
+        pending.setdefault(urllib.parse.urlsplit(link).netloc.lower(), []).append(link)
+    active = {host: 0 for host in pending}
+    host_reachable = set()
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=LINK_CHECK_WORKERS) as pool:
+        def fill_pool():
+            added = True
+            while added and len(in_flight) < LINK_CHECK_WORKERS:
+                added = False
+                for host, queue in pending.items():
+                    if queue and active[host] < LINK_CHECK_PER_HOST and len(in_flight) < LINK_CHECK_WORKERS:
+                        link = queue.pop()
+                        in_flight[pool.submit(probe_link, link)] = (host, link)
+                        active[host] += 1
+                        added = True
+
+        fill_pool()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                host, link = in_flight.pop(future)
+                active[host] -= 1
+                status = future.result()
+                results[link] = status
+                # Anche gli errori di rete (status null) restano in cache: un host giù non rallenta ogni giro
+                cache[link] = make_link_health_entry(now, status)
+                if status is not None:
+                    host_reachable.add(host)
+                elif host not in host_reachable:
+                    # L'host non risponde: i link ancora in coda si segnano irraggiungibili senza provarli
+                    for skipped in pending[host]:
+                        results[skipped] = None
+                        cache[skipped] = make_link_health_entry(now, None)
+                    pending[host] = []
+            fill_pool()
+    print(f"Controllo completato in {time.time() - start:.1f}s")
+
+    # Il registro tiene solo i link ancora pubblicati
+    save_link_health({k: v for k, v in cache.items() if k in links})
+
+    summary = {}
+    for ev in events:
+        status = results.get(ev['link'])
+        ev['link_dead'] = status in DEAD_STATUSES
+        counts = summary.setdefault(ev['source'], {"ok": 0, "morti": 0, "irraggiungibili": 0})
+        if ev['link_dead']: counts["morti"] += 1
+        elif status is None or status >= 400: counts["irraggiungibili"] += 1
+        else: counts["ok"] += 1
+    for source in sorted(summary):
+        c = summary[source]
+        print(f"   {source}: {c['ok']} ok, {c['morti']} morti, {c['irraggiungibili']} irraggiungibili")
+
 # --- CONFIGURAZIONE GRUPPI ---
 GROUPS = {
     "index.html": {
@@ -586,6 +731,26 @@ GROUPS = {
     }
 }
 
+# Box di ricerca: carica solo meta.json, gli shard dei termini cercati e i blocchi degli eventi trovati
+SEARCH_BOX_HTML = r"""<div class="search-box"><input type="search" id="search-input" placeholder="🔎 Cerca un evento, una cima, una data (es. ciaspolata, pania, febbraio)..." autocomplete="off"><div id="search-results"></div></div><script>(function(){
+var input=document.getElementById('search-input'),out=document.getElementById('search-results'),meta=null,shards={},chunks={},timer=null;
+function getJSON(u){return fetch(u).then(function(r){return r.ok?r.json():{};}).catch(function(){return {};});}
+function loadMeta(){if(meta)return Promise.resolve(meta);return getJSON('search/meta.json').then(function(m){if(!m.prefix_len)return null;m.stop=new Set(m.stopwords||[]);m.known=new Set(m.shards||[]);meta=m;return meta;});}
+function tokens(q){return (q.normalize('NFKD').replace(/[\u0300-\u036f]/g,'').toLowerCase().match(/[a-z0-9]+/g)||[]).filter(function(t){return t.length>=meta.prefix_len&&!meta.stop.has(t);});}
+function shard(p){if(!meta.known.has(p))return Promise.resolve({});if(!shards[p])shards[p]=getJSON('search/t_'+p+'.json');return shards[p];}
+function chunk(c){if(!chunks[c])chunks[c]=getJSON('search/d_'+c+'.json');return chunks[c];}
+function match(t){return shard(t.slice(0,meta.prefix_len)).then(function(s){var ids=new Set();Object.keys(s).forEach(function(k){if(k.indexOf(t)===0)s[k].forEach(function(i){ids.add(i);});});return ids;});}
+function esc(v){return String(v).replace(/[&<>"]/g,function(c){return {'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;'}[c];});}
+function search(q){loadMeta().then(function(m){if(!m){out.innerHTML='<div class="search-hit">Ricerca non disponibile al momento.</div>';return;}var ts=tokens(q);if(!ts.length){out.innerHTML='';return;}
+return Promise.all(ts.map(match)).then(function(sets){
+var ids=Array.from(sets[0]).filter(function(i){return sets.every(function(s){return s.has(i);});});
+var cs=Array.from(new Set(ids.map(function(i){return Math.floor(i/meta.chunk_size);})));
+return Promise.all(cs.map(chunk)).then(function(loaded){if(input.value!==q)return;var docs={};loaded.forEach(function(c){Object.assign(docs,c);});
+var res=ids.map(function(i){return docs[i];}).filter(Boolean).sort(function(a,b){return a[3]<b[3]?1:-1;}).slice(0,30);
+out.innerHTML=res.length?res.map(function(d){return '<div class="search-hit"><span class="search-source">'+esc(d[2])+'</span> <a href="'+esc(d[1])+'" target="_blank">'+esc(d[0])+'</a> <span class="search-date">'+d[3].split('-').reverse().join('/')+'</span></div>';}).join(''):'<div class="search-hit">Nessun risultato.</div>';});});});}
+input.addEventListener('input',function(){clearTimeout(timer);var q=input.value;timer=setTimeout(function(){search(q);},200);});
+})();</script>"""
+
 # --- GENERAZIONE HTML E NAVIGAZIONE ---
 def get_nav_html(current_page):
     nav = '<nav style="margin-bottom: 30px; text-align: center; line-height: 2.5;">'
@@ -608,7 +773,8 @@ def get_nav_html(current_page):
 
 def write_html_file(filename, title, events, is_calendar=False):
     nav_html = get_nav_html(filename)
-    html = f"""<!DOCTYPE html><html lang="it"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>{title}</title><link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap" rel="stylesheet"><style>body {{ font-family: 'Inter', sans-serif; background-color: #f3f4f6; color: #1f2937; margin: 0; padding: 20px; }} .container {{ max-width: 900px; margin: 0 auto; }} header {{ text-align: center; margin-bottom: 20px; }} h1 {{ color: #111827; margin-bottom: 5px; font-size: 1.8rem; }} .meta {{ color: #6b7280; font-size: 0.9em; margin-bottom: 20px; }} .card {{ background: white; border-radius: 12px; padding: 24px; margin-bottom: 24px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); border-left: 6px solid #ccc; transition: transform 0.2s; }} .card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }} .badge {{ display: inline-block; padding: 4px 12px; border-radius: 9999px; color: white; font-size: 0.75rem; font-weight: 700; text-transform: uppercase; letter-spacing: 0.05em; }} .date {{ float: right; color: #6b7280; font-size: 0.875rem; }} .date-header {{ background: #2c3e50; color: white; padding: 10px 20px; border-radius: 8px; margin: 30px 0 15px 0; font-size: 1.2rem; display: block; width: 100%; box-sizing: border-box; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }} .date-header::before {{ content: '🗓'; margin-right: 10px; }} h2 {{ margin-top: 12px; margin-bottom: 8px; font-size: 1.25rem; }} h2 a {{ text-decoration: none; color: #111827; }} h2 a:hover {{ color: #2563eb; }} .desc {{ color: #4b5563; line-height: 1.5; font-size: 0.95rem; margin-bottom: 16px; }} .read-more {{ display: inline-block; color: #2563eb; font-weight: 600; text-decoration: none; }} .read-more:hover {{ text-decoration: underline; }}</style></head><body><div class="container">{nav_html}<header><h1>{title}</h1><div class="meta">Ultimo aggiornamento: {datetime.now().strftime('%d/%m/%Y alle %H:%M')}</div></header>"""
+    html = f"""<!DOCTYPE html><html lang="it"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>{title}</title><link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap" rel="stylesheet"><style>body {{ font-family: 'Inter', sans-serif; background-color: #f3f4f6; color: #1f2937; margin: 0; padding: 20px; }} .container {{ max-width: 900px; margin: 0 auto; }} header {{ text-align: center; margin-bottom: 20px; }} h1 {{ color: #111827; margin-bottom: 5px; font-size: 1.8rem; }} .meta {{ color: #6b7280; font-size: 0.9em; margin-bottom: 20px; }} .card {{ background: white; border-radius: 12px; padding: 24px; margin-bottom: 24px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); border-left: 6px solid #ccc; transition: transform 0.2s; }} .card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1); }} .badge {{ display: inline-block; padding: 4px 12px; border-radius: 9999px; color: white; font-size: 0.75rem; font-weight: 700; text-transform: uppercase; letter-spacing: 0.05em; }} .date {{ float: right; color: #6b7280; font-size: 0.875rem; }} .date-header {{ background: #2c3e50; color: white; padding: 10px 20px; border-radius: 8px; margin: 30px 0 15px 0; font-size: 1.2rem; display: block; width: 100%; box-sizing: border-box; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }} .date-header::before {{ content: '🗓'; margin-right: 10px; }} h2 {{ margin-top: 12px; margin-bottom: 8px; font-size: 1.25rem; }} h2 a {{ text-decoration: none; color: #111827; }} h2 a:hover {{ color: #2563eb; }} .desc {{ color: #4b5563; line-height: 1.5; font-size: 0.95rem; margin-bottom: 16px; }} .read-more {{ display: inline-block; color: #2563eb; font-weight: 600; text-decoration: none; }} .read-more:hover {{ text-decoration: underline; }} .dead-link {{ color: #b91c1c; font-size: 0.85rem; font-weight: 600; margin-bottom: 12px; }} .search-box {{ margin-bottom: 24px; }} #search-input {{ width: 100%; box-sizing: border-box; padding: 12px 16px; border: 2px solid #e5e7eb; border-radius: 12px; font-size: 1rem; font-family: inherit; }} #search-input:focus {{ outline: none; border-color: #2563eb; }} .search-hit {{ background: white; padding: 10px 16px; border-bottom: 1px solid #e5e7eb; font-size: 0.95rem; }} .search-hit a {{ color: #111827; text-decoration: none; font-weight: 600; }} .search-hit a:hover {{ color: #2563eb; }} .search-source {{ color: #6b7280; font-size: 0.75rem; font-weight: 700; text-transform: uppercase; }} .search-date {{ float: right; color: #6b7280; font-size: 0.85rem; }}</style></head><body><div class="container">{nav_html}<header><h1>{title}</h1><div class="meta">Ultimo aggiornamento: {datetime.now().strftime('%d/%m/%Y alle %H:%M')}</div></header>"""
+    html += SEARCH_BOX_HTML
     if not events: html += "<p style='text-align:center;'>Nessun evento futuro trovato.</p>"
     last_header_date = None
     for event in events:
@@ -621,14 +787,126 @@ def write_html_file(filename, title, events, is_calendar=False):
                 last_header_date = current_date_key
             sort_date_str = "" 
         else: sort_date_str = event['date'].strftime("%d/%m/%Y")
-        html += f"""<div class="card" style="border-left-color: {event['color']}"><div><span class="badge" style="background-color: {event['color']}">{event['source']}</span><span class="date">{sort_date_str}</span></div><h2><a href="{event['link']}" target="_blank">{event['title']}</a></h2><div class="desc">{event['summary']}</div><a href="{event['link']}" class="read-more" target="_blank">Apri risorsa &rarr;</a></div>"""
+        dead_html = '<div class="dead-link">⚠️ Link non più disponibile sul sito della sezione</div>' if event.get('link_dead') else ""
+        html += f"""<div class="card" style="border-left-color: {event['color']}"><div><span class="badge" style="background-color: {event['color']}">{event['source']}</span><span class="date">{sort_date_str}</span></div><h2><a href="{event['link']}" target="_blank">{event['title']}</a></h2><div class="desc">{event['summary']}</div>{dead_html}<a href="{event['link']}" class="read-more" target="_blank">Apri risorsa &rarr;</a></div>"""
     html += "</div></body></html>"
     with open(filename, "w", encoding="utf-8") as f: f.write(html)
     print(f"✅ Generato: {filename}")
 
+# --- INDICE DI RICERCA ---
+def normalize_search_text(text):
+    # Decodifica le entità rimaste dai feed (&#8217;, &hellip;), piega gli accenti (è -> e) e scarta emoji e punteggiatura
+    text = unicodedata.normalize('NFKD', unescape(text or ""))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return [t for t in re.findall(r'[a-z0-9]+', text) if len(t) >= SEARCH_PREFIX_LEN and t not in SEARCH_STOPWORDS]
+
+def build_search_doc(ev, page):
+    shown_date = ev.get('event_date') or ev['date']
+    title = re.sub(r'^\W*\[IMG\]', '', ev['title']).strip()
+    section = GROUPS[page]['title'].split('(')[0].strip()
+    date_text = f"{format_date_friendly(shown_date)} {shown_date.strftime('%d/%m/%Y')}"
+    text = " ".join([title, ev['summary'], ev['source'], section, date_text])
+    record = [ev['title'], ev['link'], ev['source'], shown_date.strftime('%Y-%m-%d'), page]
+    return record, text
+
+def write_search_file(name, data):
+    with open(os.path.join(SEARCH_DIR, name), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def save_search_state(state):
+    with open(SEARCH_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def load_search_state():
+    # Uno stato illeggibile o con una forma inattesa porta a una ricostruzione completa
+    try:
+        with open(SEARCH_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if isinstance(state.get('next_id'), int) and all(
+                isinstance(d, dict) and isinstance(d.get('id'), int) and isinstance(d.get('terms'), list) and 'hash' in d and 'record' in d
+                for d in state['docs'].values()):
+            # L'indice su disco deve contenere tutti gli shard e i blocchi a cui lo stato si riferisce
+            needed = {"meta.json"}
+            for d in state['docs'].values():
+                needed.add(f"d_{d['id'] // SEARCH_DOCS_PER_CHUNK}.json")
+                needed.update(f"t_{t[:SEARCH_PREFIX_LEN]}.json" for t in d['terms'])
+            if os.path.isdir(SEARCH_DIR) and needed <= set(os.listdir(SEARCH_DIR)):
+                return state
+    except: pass
+    return None
+
+def build_search_index(group_events):
+    start = time.time()
+    state = load_search_state()
+
+    current = {}
+    for page, events in group_events.items():
+        for ev in events:
+            key = f"{ev['link']}::{ev['title']}"
+            if key in current: continue
+            record, text = build_search_doc(ev, page)
+            digest = hashlib.sha1(json.dumps([record, text], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+            current[key] = (record, text, digest)
+
+    # Troppi id lasciati liberi da eventi rimossi: si riparte da zero
+    if state and state['next_id'] > 2 * len(current) + SEARCH_DOCS_PER_CHUNK: state = None
+    if state is None:
+        shutil.rmtree(SEARCH_DIR, ignore_errors=True)
+        state = {"next_id": 0, "docs": {}}
+    os.makedirs(SEARCH_DIR, exist_ok=True)
+
+    docs = state['docs']
+    touched_prefixes, touched_chunks = set(), set()
+    added = changed = removed = 0
+    for key in list(docs):
+        if key in current: continue
+        old = docs.pop(key)
+        touched_prefixes.update(t[:SEARCH_PREFIX_LEN] for t in old['terms'])
+        touched_chunks.add(old['id'] // SEARCH_DOCS_PER_CHUNK)
+        removed += 1
+    for key, (record, text, digest) in current.items():
+        old = docs.get(key)
+        if old and old['hash'] == digest: continue
+        if old:
+            doc_id = old['id']
+            touched_prefixes.update(t[:SEARCH_PREFIX_LEN] for t in old['terms'])
+            changed += 1
+        else:
+            doc_id = state['next_id']
+            state['next_id'] += 1
+            added += 1
+        terms = sorted(set(normalize_search_text(text)))
+        docs[key] = {"id": doc_id, "hash": digest, "record": record, "terms": terms}
+        touched_prefixes.update(t[:SEARCH_PREFIX_LEN] for t in terms)
+        touched_chunks.add(doc_id // SEARCH_DOCS_PER_CHUNK)
+
+    # Le posting list si ricalcolano in memoria, ma su disco si riscrivono solo shard e blocchi toccati
+    shards, chunks = {}, {}
+    for doc in docs.values():
+        for term in doc['terms']:
+            shards.setdefault(term[:SEARCH_PREFIX_LEN], {}).setdefault(term, []).append(doc['id'])
+        chunks.setdefault(doc['id'] // SEARCH_DOCS_PER_CHUNK, {})[str(doc['id'])] = doc['record']
+
+    for prefix in touched_prefixes:
+        name = f"t_{prefix}.json"
+        if prefix in shards: write_search_file(name, {t: sorted(ids) for t, ids in shards[prefix].items()})
+        elif os.path.exists(os.path.join(SEARCH_DIR, name)): os.remove(os.path.join(SEARCH_DIR, name))
+    for chunk_id in touched_chunks:
+        name = f"d_{chunk_id}.json"
+        if chunk_id in chunks: write_search_file(name, chunks[chunk_id])
+        elif os.path.exists(os.path.join(SEARCH_DIR, name)): os.remove(os.path.join(SEARCH_DIR, name))
+
+    write_search_file("meta.json", {"prefix_len": SEARCH_PREFIX_LEN, "chunk_size": SEARCH_DOCS_PER_CHUNK, "stopwords": sorted(SEARCH_STOPWORDS), "shards": sorted(shards)})
+    save_search_state(state)
+
+    size = sum(os.path.getsize(os.path.join(SEARCH_DIR, n)) for n in os.listdir(SEARCH_DIR))
+    print(f"🔎 Indice di ricerca: {len(docs)} eventi ({added} nuovi, {changed} modificati, {removed} rimossi), "
+          f"{len(touched_prefixes) + len(touched_chunks)} file riscritti, {size / 1024:.1f} KB in {time.time() - start:.2f}s")
+
 # --- ESECUZIONE ---
 GLOBAL_EVENTS = [] 
 CALENDAR_EVENTS = [] 
+GROUP_EVENTS = {}
 for filename, group_data in GROUPS.items():
     print(f"\n--- Gruppo: {group_data['title']} ---")
     current_group_events = []
@@ -677,12 +955,28 @@ for filename, group_data in GROUPS.items():
         if ev.get('event_date') and ev['event_date'].date() >= datetime.now().date(): CALENDAR_EVENTS.append(ev)
 
     current_group_events.sort(key=lambda x: x["date"], reverse=True)
-    write_html_file(filename, group_data['title'], current_group_events)
+    GROUP_EVENTS[filename] = current_group_events
     GLOBAL_EVENTS.extend(current_group_events)
 
+# CONTROLLO LINK (OPZIONALE)
+if LINK_CHECK_MODE in ("mark", "drop"):
+    try: check_links(GLOBAL_EVENTS)
+    except Exception as e: print(f"Err controllo link: {e}")
+    if LINK_CHECK_MODE == "drop":
+        for filename in GROUP_EVENTS:
+            GROUP_EVENTS[filename] = [e for e in GROUP_EVENTS[filename] if not e.get('link_dead')]
+        GLOBAL_EVENTS = [e for e in GLOBAL_EVENTS if not e.get('link_dead')]
+        CALENDAR_EVENTS = [e for e in CALENDAR_EVENTS if not e.get('link_dead')]
+
+for filename, group_events in GROUP_EVENTS.items():
+    write_html_file(filename, GROUPS[filename]['title'], group_events)
+
 GLOBAL_EVENTS.sort(key=lambda x: x["date"], reverse=True)
 write_html_file("tutto.html", "Tutti gli Eventi CAI (Aggregati)", GLOBAL_EVENTS)
 CALENDAR_EVENTS.sort(key=lambda x: x["event_date"])
 write_html_file("calendario.html", "📅 Calendario Prossimi Eventi CAI TOSCANA", CALENDAR_EVENTS, is_calendar=True)
 
 save_registry()
+
+try: build_search_index(GROUP_EVENTS)
+except Exception as e: print(f"Err indice di ricerca: {e}")